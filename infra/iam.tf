@@ -54,6 +54,21 @@ data "aws_iam_policy_document" "lambda_processing_policy" {
       "${aws_s3_bucket.citroen-cost-prediction.arn}/*"
     ]
   }
+
+  statement {
+    effect = "Allow"
+
+    actions = ["cloudwatch:PutMetricData"]
+
+    # PutMetricData does not support resource-level permissions
+    resources = ["*"]
+
+    condition {
+      test     = "StringEquals"
+      variable = "cloudwatch:namespace"
+      values   = [var.validation_metrics_namespace]
+    }
+  }
 }
 
 data "aws_iam_policy_document" "lambda_dedup_policy" {
@@ -1,7 +1,14 @@
 data "archive_file" "processing_lambda_function" {
   type        = "zip"
-  source_file = "./lambda/processing.py"
   output_path = "${var.lambda_processing_name}.zip"
+  source {
+    content  = file("./lambda/processing.py")
+    filename = "processing.py"
+  }
+  source {
+    content  = file("../src/data/validation.py")
+    filename = "validation.py"
+  }
 }
 
 data "archive_file" "dedup_lambda_function" {
@@ -22,7 +29,9 @@ resource "aws_lambda_function" "processing_lambda_function" {
   layers           = ["arn:aws:lambda:${var.region}:336392948345:layer:AWSSDKPandas-Python39:9"]
   environment {
     variables = {
-      OUTPUT_PATH = "s3://${aws_s3_object.processed-data.bucket}/${aws_s3_object.processed-data.key}"
+      OUTPUT_PATH       = "s3://${aws_s3_object.processed-data.bucket}/${aws_s3_object.processed-data.key}"
+      QUARANTINE_PATH   = "s3://${aws_s3_object.quarantine-data.bucket}/${aws_s3_object.quarantine-data.key}"
+      METRICS_NAMESPACE = var.validation_metrics_namespace
     }
   }
 }
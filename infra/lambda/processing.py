@@ -3,6 +3,44 @@ import os
 import urllib.parse
 
 import awswrangler as wr
+import boto3
+from validation import validate
+
+PARQUET_DTYPE = {
+    "fecha": "date",
+    "hora_salida": "string",
+    "hora_llegada": "string",
+    "direccion_origen": "string",
+    "direccion_destino": "string",
+    "distancia": "double",
+    "kilometraje": "int",
+    "consumo_medio": "double",
+    "precio_carburante": "double",
+    "coste": "double",
+    "year": "string",
+    "month": "string",
+}
+
+
+def put_validation_metrics(namespace, n_rows, rejected):
+    """
+    Publish the number of processed rows and the number of rows rejected by
+    each validation rule as CloudWatch metrics, so that a misbehaving rule
+    can be spotted (and alarmed on) instead of silently dropping data.
+    """
+    metric_data = [{"MetricName": "ProcessedRows", "Value": n_rows, "Unit": "Count"}]
+    metric_data += [
+        {
+            "MetricName": "RejectedRows",
+            "Dimensions": [{"Name": "Rule", "Value": rule}],
+            "Value": n_rejected,
+            "Unit": "Count",
+        }
+        for rule, n_rejected in rejected.items()
+    ]
+    boto3.client("cloudwatch").put_metric_data(
+        Namespace=namespace, MetricData=metric_data
+    )
 
 
 def lambda_handler(event, context):
@@ -23,7 +61,10 @@ def lambda_handler(event, context):
     4. Performs some transformations.
     5. Enforces the schema.
     6. Adds partition columns.
-    7. Writes the data to Parquet format.
+    7. Validates the rows, moving the rejected rows to the quarantine path.
+    8. Writes the valid rows to Parquet format.
+    9. Publishes the rejections per rule as CloudWatch metrics. A failure
+    there is only logged, since the data is already written.
 
     Returns
     -------
@@ -31,6 +72,8 @@ def lambda_handler(event, context):
     """
     print("Received event: " + json.dumps(event))
     OUTPUT_PATH = os.environ["OUTPUT_PATH"]
+    QUARANTINE_PATH = os.environ["QUARANTINE_PATH"]
+    METRICS_NAMESPACE = os.environ["METRICS_NAMESPACE"]
     # Get the object from the event and show its content type
     bucket = event["Records"][0]["s3"]["bucket"]["name"]
     key = urllib.parse.unquote_plus(
@@ -89,6 +132,22 @@ def lambda_handler(event, context):
     df["year"] = df.fecha.dt.year
     df["month"] = df.fecha.dt.month
     print("Done!")
+    print("Validating data...")
+    valid, rejected = validate(df)
+    print(f"Rejected rows per rule: {rejected}")
+    n_rows = len(df)
+    if not valid.all():
+        print(f"Quarantining {n_rows - valid.sum()} rows...")
+        wr.s3.to_parquet(
+            df[~valid],
+            path=QUARANTINE_PATH,
+            dataset=True,
+            partition_cols=["year", "month"],
+            mode="append",
+            dtype=PARQUET_DTYPE,
+        )
+    df = df[valid]
+    print("Done!")
     print("Writing to parquet...")
     wr.s3.to_parquet(
         df,
@@ -96,20 +155,15 @@ def lambda_handler(event, context):
         dataset=True,
         partition_cols=["year", "month"],
         mode="append",
-        dtype={
-            "fecha": "date",
-            "hora_salida": "string",
-            "hora_llegada": "string",
-            "direccion_origen": "string",
-            "direccion_destino": "string",
-            "distancia": "double",
-            "kilometraje": "int",
-            "consumo_medio": "double",
-            "precio_carburante": "double",
-            "coste": "double",
-            "year": "string",
-            "month": "string",
-        },
+        dtype=PARQUET_DTYPE,
     )
     print("Done!")
+    # After the writes, so that a CloudWatch error never loses the data
+    print("Publishing validation metrics...")
+    try:
+        put_validation_metrics(METRICS_NAMESPACE, n_rows=n_rows, rejected=rejected)
+    except Exception as error:
+        print(f"Could not publish the validation metrics: {error!r}")
+    else:
+        print("Done!")
     return {"status": 201}
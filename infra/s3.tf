@@ -22,6 +22,13 @@ resource "aws_s3_object" "processed-data" {
   content_type = "application/x-directory"                # Set the content type as a directory
 }
 
+# Create an S3 object for the rows rejected by the data validation
+resource "aws_s3_object" "quarantine-data" {
+  bucket       = aws_s3_bucket.citroen-cost-prediction.id # The ID of the S3 bucket created above
+  key          = "${var.quarantine_data_name}/"           # The key/path of the S3 object with a variable name for quarantined data
+  content_type = "application/x-directory"                # Set the content type as a directory
+}
+
 # Create an S3 object for deduped data
 resource "aws_s3_object" "dedup-data" {
   bucket       = aws_s3_bucket.citroen-cost-prediction.id # The ID of the S3 bucket created above
@@ -22,6 +22,18 @@ variable "processed_data_name" {
   type        = string
 }
 
+variable "quarantine_data_name" {
+  default     = "quarantine-data"
+  description = "The name for the folder of the rows rejected by the data validation"
+  type        = string
+}
+
+variable "validation_metrics_namespace" {
+  default     = "CitroenCostPrediction/Validation"
+  description = "The CloudWatch namespace of the data validation metrics"
+  type        = string
+}
+
 variable "dedup_data_name" {
   default     = "dedup-data"
   description = "The name for the deduplicated data folder"
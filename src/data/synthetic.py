@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+from pathlib import Path
+from typing import Iterable, Iterator, List, Sequence
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.models.exponential.base import ExponentialModel
+
+# Parameters of `ExponentialModel._model_func` used to build the trip cost.
+# They give ~0.1 l/km for very short trips and ~0.05 l/km for long ones.
+DEFAULT_PARAMS = (0.05, 0.05, 0.1, 0.0)
+
+# Raw column names of the car export, as renamed by the processing Lambda
+RAW_COLUMNS = {
+    "fecha": "fecha",
+    "hora_salida": "hora de salida",
+    "hora_llegada": "hora de llegada",
+    "duracion": "duración",
+    "direccion_origen": "dirección de origen",
+    "direccion_destino": "dirección de destino",
+    "distancia": "distancia",
+    "kilometraje": "Kilometraje en el contador (km)",
+    "consumo_medio": "consumo medio (l/100km)",
+    "precio_carburante": "precio del carburante (EUR/l)",
+    "coste": "coste (EUR)",
+    "categoria": "categoría",
+}
+
+# Schema written by the processing Lambda into the partitioned dataset
+PARQUET_SCHEMA = pa.schema(
+    [
+        ("fecha", pa.date32()),
+        ("hora_salida", pa.string()),
+        ("hora_llegada", pa.string()),
+        ("direccion_origen", pa.string()),
+        ("direccion_destino", pa.string()),
+        ("distancia", pa.float64()),
+        ("kilometraje", pa.int32()),
+        ("consumo_medio", pa.float64()),
+        ("precio_carburante", pa.float64()),
+        ("coste", pa.float64()),
+        ("year", pa.string()),
+        ("month", pa.string()),
+    ]
+)
+
+_STREETS = np.array(
+    [
+        "Calle Mayor",
+        "Gran Vía",
+        "Paseo de la Castellana",
+        "Avenida de América",
+        "Calle de Alcalá",
+        "Calle de Serrano",
+        "Ronda de Toledo",
+        "Avenida de los Andes",
+    ]
+)
+_CITIES = np.array(["Madrid", "Alcobendas", "Getafe", "Toledo", "Segovia"])
+_CATEGORIES = np.array(["Trabajo", "Personal", "Ocio"])
+
+
+def _random_addresses(rng: np.random.Generator, size: int) -> pd.Series:
+    streets = pd.Series(rng.choice(_STREETS, size=size), dtype="string")
+    numbers = pd.Series(rng.integers(1, 200, size=size)).astype("string")
+    cities = pd.Series(rng.choice(_CITIES, size=size), dtype="string")
+    return streets + " " + numbers + ", " + cities
+
+
+def _format_minutes(minutes: np.ndarray) -> pd.Series:
+    minutes = minutes.astype(np.int64)
+    hours = pd.Series(minutes // 60).astype("string").str.zfill(2)
+    mins = pd.Series(minutes % 60).astype("string").str.zfill(2)
+    return hours + ":" + mins
+
+
+def generate_trips(
+    n_rows: int,
+    chunk_size: int = 100_000,
+    params: Sequence[float] = DEFAULT_PARAMS,
+    noise: float = 0.02,
+    start_date: str = "2022-01-01",
+    end_date: str = "2023-12-31",
+    random_state: int = 42,
+) -> Iterator[pd.DataFrame]:
+    """
+    Generate synthetic trips with the schema of the processed dataset.
+
+    The trips are yielded in chunks of at most `chunk_size` rows, so that
+    arbitrarily large datasets can be produced with flat memory usage.
+
+    Args
+    ----
+    - `n_rows` (int): Total number of trips to generate.
+    - `chunk_size` (int): Maximum number of trips in each yielded DataFrame.
+    - `params` (Sequence[float]): The `w0`, `w1`, `w2` and `w3` parameters of
+    the `ExponentialModel` formula used to compute the cost of each trip.
+    - `noise` (float): Standard deviation of the multiplicative gaussian noise
+    applied to the cost.
+    - `start_date`, `end_date` (str): Date range where the trip dates are
+    uniformly drawn from.
+    - `random_state` (int): Seed of the random generator. The same seed and
+    `chunk_size` always yield the same trips.
+
+    Returns
+    -------
+    - `Iterator[pd.DataFrame]`: DataFrames with the columns of
+    `PARQUET_SCHEMA` (except for the `year` and `month` partition columns)
+    plus the `duracion` and `categoria` columns of the raw export.
+
+    Raises
+    ------
+    - `ValueError`: If `n_rows` is negative or `chunk_size` is not positive.
+
+    Example
+    -------
+    >>> df = pd.concat(generate_trips(n_rows=1000))
+    >>> X = df[["distancia", "kilometraje", "precio_carburante"]].to_numpy()
+    """
+    if n_rows < 0:
+        raise ValueError("n_rows must be non-negative")
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+
+    start = np.datetime64(start_date, "D")
+    n_days = int((np.datetime64(end_date, "D") - start).astype(int)) + 1
+    # One independent stream per chunk index keeps the output reproducible
+    seeds = np.random.SeedSequence(random_state)
+    for offset in range(0, n_rows, chunk_size):
+        size = min(chunk_size, n_rows - offset)
+        rng = np.random.default_rng(seeds.spawn(1)[0])
+
+        day = rng.integers(0, n_days, size=size)
+        fecha = start + day.astype("timedelta64[D]")
+        distance = np.round(rng.lognormal(mean=2.5, sigma=1.0, size=size), 1) + 0.1
+        mileage = (1_000 + 40 * day + rng.integers(0, 40, size=size)).astype(np.int32)
+        season = np.sin(2 * np.pi * day / 365.25)
+        fuel_price = np.round(
+            1.6 + 0.15 * season + rng.normal(0, 0.05, size=size), 3
+        ).clip(min=0.8)
+
+        X = np.column_stack([distance, mileage, fuel_price])
+        cost = ExponentialModel._model_func(X, *params)
+        cost = np.round(cost * (1 + rng.normal(0, noise, size=size)), 2).clip(min=0.01)
+        consumption = cost / (distance * fuel_price)
+
+        departure = rng.integers(6 * 60, 22 * 60, size=size)
+        duration = np.maximum(1, np.round(distance / rng.uniform(30, 90, size) * 60))
+        arrival = (departure + duration) % (24 * 60)
+
+        yield pd.DataFrame(
+            {
+                "fecha": fecha,
+                "hora_salida": _format_minutes(departure),
+                "hora_llegada": _format_minutes(arrival),
+                "duracion": _format_minutes(duration),
+                "direccion_origen": _random_addresses(rng, size),
+                "direccion_destino": _random_addresses(rng, size),
+                "distancia": distance,
+                "kilometraje": mileage,
+                "consumo_medio": consumption,
+                "precio_carburante": fuel_price,
+                "coste": cost,
+                "categoria": pd.Series(
+                    rng.choice(_CATEGORIES, size=size), dtype="string"
+                ),
+            }
+        )
+
+
+def write_parquet_dataset(
+    chunks: Iterable[pd.DataFrame], path: str, rows_per_write: int = 1_000_000
+) -> int:
+    """
+    Write trip chunks as a Parquet dataset partitioned by `year` and `month`,
+    just like the processing Lambda does.
+
+    The chunks are accumulated until `rows_per_write` rows are pending, and
+    then written as a new file inside every partition they touch, so a
+    dataset with many small chunks is not split into many tiny files.
+
+    Args
+    ----
+    - `chunks` (Iterable[pd.DataFrame]): The trips to write, as returned by
+    `generate_trips`.
+    - `path` (str): Root directory of the dataset. It must not exist or be
+    empty, so that no file of a previous dataset is mixed with the new one.
+    - `rows_per_write` (int): Number of rows accumulated in memory before
+    they are written.
+
+    Returns
+    -------
+    - `int`: The number of rows written.
+
+    Raises
+    ------
+    - `FileExistsError`: If `path` is a non-empty directory.
+    """
+    root = Path(path)
+    if root.exists() and any(root.iterdir()):
+        raise FileExistsError(f"The output directory {path} is not empty")
+    pending: List[pa.Table] = []
+    n_pending = 0
+    n_writes = 0
+    n_rows = 0
+
+    def write_pending() -> None:
+        pq.write_to_dataset(
+            pa.concat_tables(pending),
+            root_path=path,
+            partition_cols=["year", "month"],
+            basename_template=f"part-{n_writes:05d}-{{i}}.parquet",
+        )
+
+    for chunk in chunks:
+        chunk = chunk.assign(
+            year=chunk.fecha.dt.year.astype("string"),
+            month=chunk.fecha.dt.month.astype("string"),
+        )
+        pending.append(
+            pa.Table.from_pandas(
+                chunk[PARQUET_SCHEMA.names], schema=PARQUET_SCHEMA, preserve_index=False
+            )
+        )
+        n_pending += len(chunk)
+        n_rows += len(chunk)
+        if n_pending >= rows_per_write:
+            write_pending()
+            pending, n_pending = [], 0
+            n_writes += 1
+    if pending:
+        write_pending()
+    return n_rows
+
+
+def write_raw_csv(chunks: Iterable[pd.DataFrame], path: str) -> int:
+    """
+    Write trip chunks as a single CSV file in the raw export format read by
+    the processing Lambda (`;` separated, `,` as decimal mark, day-first dates
+    and consumption in l/100km).
+
+    Args
+    ----
+    - `chunks` (Iterable[pd.DataFrame]): The trips to write, as returned by
+    `generate_trips`.
+    - `path` (str): The path of the CSV file.
+
+    Returns
+    -------
+    - `int`: The number of rows written.
+    """
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    n_rows = 0
+    with open(path, "w", encoding="utf-8", newline="") as csv_file:
+        for chunk in chunks:
+            chunk = chunk.assign(
+                fecha=chunk.fecha.dt.strftime("%d/%m/%Y"),
+                consumo_medio=chunk.consumo_medio * 100,
+            ).rename(columns=RAW_COLUMNS)
+            chunk.to_csv(
+                csv_file,
+                sep=";",
+                decimal=",",
+                index=False,
+                header=n_rows == 0,
+            )
+            n_rows += len(chunk)
+    return n_rows
+
+
+def main():
+    """
+    Generate a synthetic trip dataset and write it to disk in the requested
+    format.
+    """
+    args = parse_args()
+    chunks = generate_trips(
+        n_rows=args.rows, chunk_size=args.chunk_size, random_state=args.seed
+    )
+    if args.format == "parquet":
+        write_parquet_dataset(chunks, path=args.output)
+    else:
+        write_raw_csv(chunks, path=args.output)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="Synthetic data script",
+        description="Generates synthetic trips for offline and scale testing",
+        epilog="End of help",
+    )
+    parser.add_argument(
+        "-n",
+        "--rows",
+        type=int,
+        required=False,
+        default=100_000,
+        help="Number of trips to generate. Default: 100000",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        required=False,
+        default=os.path.join(os.getcwd(), "synthetic"),
+        help="Output directory (parquet) or file (csv)",
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=["parquet", "csv"],
+        required=False,
+        default="parquet",
+        help="Partitioned parquet dataset or raw CSV export. Default: parquet",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        required=False,
+        default=100_000,
+        help="Number of trips generated at once. Default: 100000",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        required=False,
+        default=42,
+        help="Random seed. Default: 42",
+    )
+    args = parser.parse_args()
+    return args
+
+
+if __name__ == "__main__":
+    main()
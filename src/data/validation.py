@@ -0,0 +1,116 @@
+"""
+Vectorized validation of trip data.
+
+This module only depends on NumPy, so that it can be shipped as is with the
+processing Lambda, besides being used before training and batch scoring.
+"""
+
+from typing import Dict, Mapping, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+
+class RangeRule(NamedTuple):
+    """Accept the rows whose `column` is within `[low, high]` (NaN is rejected)."""
+
+    name: str
+    column: str
+    low: float
+    high: float
+
+
+DEFAULT_RULES = (
+    RangeRule("distance_range", "distancia", 0.01, 2_000.0),
+    RangeRule("mileage_range", "kilometraje", 0, 2_000_000),
+    RangeRule("consumption_range", "consumo_medio", 0.01, 0.5),
+    RangeRule("fuel_price_range", "precio_carburante", 0.3, 5.0),
+    RangeRule("cost_range", "coste", 0.01, 1_000.0),
+)
+
+# Name of the rule that checks coste == consumo_medio * distancia * precio
+COST_CONSISTENCY = "cost_consistency"
+
+
+def validate(
+    columns: Mapping,
+    rules: Sequence[RangeRule] = DEFAULT_RULES,
+    cost_rtol: float = 0.05,
+    cost_atol: float = 0.02,
+    chunk_size: int = 65536,
+) -> Tuple[np.ndarray, Dict[str, int]]:
+    """
+    Check every row of a trip dataset against the validation rules.
+
+    The rules whose columns are missing are skipped, so the same rules work
+    on the raw trips, on the training data (without `consumo_medio`) and on
+    scoring data (without `coste`). Besides the range rules, when
+    `consumo_medio`, `distancia`, `precio_carburante` and `coste` are all
+    present, the `cost_consistency` rule checks that the cost matches the
+    consumption within `cost_rtol * coste + cost_atol`.
+
+    All the rules are applied chunk by chunk in a single pass over the
+    columns, using preallocated buffers, so that each chunk is still in cache
+    when the next rule reads it.
+
+    Args
+    ----
+    - `columns` (Mapping): The dataset, as a `pd.DataFrame` or any mapping
+    from column name to 1-D array.
+    - `rules` (Sequence[RangeRule]): The range rules to apply.
+    - `cost_rtol`, `cost_atol` (float): Relative and absolute tolerance of
+    the `cost_consistency` rule.
+    - `chunk_size` (int): Number of rows checked at once.
+
+    Returns
+    -------
+    - `Tuple[np.ndarray, Dict[str, int]]`: A boolean mask of the valid rows
+    and the number of rows rejected by each applied rule. A row breaking
+    several rules is counted in each of them.
+
+    Example
+    -------
+    >>> valid, rejected = validate(df)
+    >>> df = df[valid]
+    """
+    present = [rule for rule in rules if rule.column in columns]
+    arrays = [np.asarray(columns[rule.column]) for rule in present]
+    cost_columns = ["consumo_medio", "distancia", "precio_carburante", "coste"]
+    check_cost = all(column in columns for column in cost_columns)
+    if check_cost:
+        consumption, distance, fuel_price, cost = (
+            np.asarray(columns[column], dtype=np.float64) for column in cost_columns
+        )
+
+    if not arrays and not check_cost:
+        raise ValueError("None of the validation rules applies to the columns")
+    n_rows = len(arrays[0]) if arrays else len(cost)
+    valid = np.ones(n_rows, dtype=bool)
+    rejected = {rule.name: 0 for rule in present}
+    if check_cost:
+        rejected[COST_CONSISTENCY] = 0
+    size = min(chunk_size, n_rows)
+    accepted, upper = np.empty(size, dtype=bool), np.empty(size, dtype=bool)
+    expected, tolerance = np.empty(size), np.empty(size)
+
+    for start in range(0, n_rows, chunk_size):
+        stop = min(start + chunk_size, n_rows)
+        m = stop - start
+        ok, acc, up = valid[start:stop], accepted[:m], upper[:m]
+        for rule, x in zip(present, arrays):
+            np.greater_equal(x[start:stop], rule.low, out=acc)
+            np.less_equal(x[start:stop], rule.high, out=up)
+            acc &= up
+            rejected[rule.name] += m - int(np.count_nonzero(acc))
+            ok &= acc
+        if check_cost:
+            exp, tol = expected[:m], tolerance[:m]
+            np.multiply(consumption[start:stop], distance[start:stop], out=exp)
+            exp *= fuel_price[start:stop]
+            exp -= cost[start:stop]
+            np.abs(exp, out=exp)
+            np.multiply(cost[start:stop], cost_rtol, out=tol)
+            tol += cost_atol
+            np.less_equal(exp, tol, out=acc)
+            rejected[COST_CONSISTENCY] += m - int(np.count_nonzero(acc))
+            ok &= acc
+    return valid, rejected
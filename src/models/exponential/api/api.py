@@ -1,10 +1,16 @@
 #!/usr/bin/env python3
 
-from flask import Flask, render_template, request
+import argparse
+import os
+
+import numpy as np
+from flask import Flask, jsonify, render_template, request
 
 import mlflow
+from src.models.exponential.api.shadow import ShadowScorer
 
 app = Flask(__name__)
+app.config["SHADOW"] = None
 
 
 @app.route("/", methods=["GET", "POST"])
@@ -14,18 +20,79 @@ def index():
         # Get values through input bars
         distance = float(request.form.get("distance"))
         fuel_price = float(request.form.get("fuel_price"))
-        output = model.predict_endpoint(
-            distance=distance, fuel_price=fuel_price, mileage=0
-        )
+        # Unrounded, so that the shadow scoring is not biased by the rounding
+        if hasattr(model, "bootstrap_params_"):
+            y_pred, lower, upper = model.predict_endpoint(
+                distance=distance,
+                fuel_price=fuel_price,
+                mileage=0,
+                precision=None,
+                return_interval=True,
+            )
+            interval = f"{round(lower, 3)} - {round(upper, 3)}"
+        else:
+            y_pred = model.predict_endpoint(
+                distance=distance, fuel_price=fuel_price, mileage=0, precision=None
+            )
+            interval = ""
+        output = round(y_pred, 3)
+        shadow = app.config["SHADOW"]
+        if shadow is not None and shadow.sample():
+            shadow.submit(np.array([[distance, 0, fuel_price]]), y_pred)
     else:
         output = ""
+        interval = ""
+
+    return render_template("index.html", output=output, interval=interval)
+
 
-    return render_template("index.html", output=output)
+@app.route("/shadow", methods=["GET"])
+def shadow_stats():
+    shadow = app.config["SHADOW"]
+    if shadow is None:
+        return jsonify({"error": "No candidate model loaded"}), 404
+    return jsonify(shadow.stats())
 
 
 def main():
+    args = parse_args()
+    if args.candidate:
+        candidate = mlflow.sklearn.load_model(model_uri=args.candidate)
+        app.config["SHADOW"] = ShadowScorer(candidate, fraction=args.shadow_fraction)
     app.run(host="0.0.0.0", port=8000)
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="API script",
+        description="Serves the model predictions",
+        epilog="End of help",
+    )
+    parser.add_argument(
+        "-c",
+        "--candidate",
+        type=str,
+        required=False,
+        default=os.environ.get("CANDIDATE_MODEL_URI"),
+        help=(
+            "Candidate model scored in the background on a fraction of the"
+            " requests, to compare it against production on live traffic."
+            " Default: CANDIDATE_MODEL_URI environment variable, if set"
+        ),
+    )
+    parser.add_argument(
+        "--shadow-fraction",
+        type=float,
+        required=False,
+        default=float(os.environ.get("SHADOW_FRACTION", 0.1)),
+        help=(
+            "Fraction of the requests scored by the candidate model."
+            " Default: SHADOW_FRACTION environment variable or 0.1"
+        ),
+    )
+    args = parser.parse_args()
+    return args
+
+
 if __name__ == "__main__":
     main()
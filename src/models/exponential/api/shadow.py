@@ -0,0 +1,144 @@
+import queue
+import random
+import threading
+from typing import Dict, Optional
+
+import numpy as np
+
+
+class ShadowScorer:
+    """
+    Score a sampled fraction of the live requests with a candidate model,
+    in a background thread, and aggregate how much it diverges from the
+    production model.
+
+    The request path only draws a random number with `sample` and, for
+    sampled requests, puts the input row and the prediction served by
+    production in a bounded queue with `submit`, without blocking. The
+    candidate predictions are computed by the worker thread, which drains
+    the queue in batches. When the queue is full the request is dropped from
+    the comparison instead of waiting.
+
+    Args
+    ----
+    - `candidate`: The fitted candidate model.
+    - `fraction` (float): Fraction of requests scored by the candidate.
+    - `max_queue` (int): Maximum number of requests waiting to be scored.
+    - `batch_size` (int): Maximum number of requests scored at once.
+    """
+
+    def __init__(
+        self,
+        candidate,
+        fraction: float = 0.1,
+        max_queue: int = 10000,
+        batch_size: int = 256,
+    ) -> None:
+        if not 0 <= fraction <= 1:
+            raise ValueError("fraction must be between 0 and 1")
+        self.candidate = candidate
+        self.fraction = fraction
+        self.batch_size = batch_size
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._n = 0
+        self._dropped = 0
+        self._errors = 0
+        self._sum_diff = 0.0
+        self._sum_abs_diff = 0.0
+        self._sum_sq_diff = 0.0
+        self._max_abs_diff = 0.0
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def sample(self) -> bool:
+        """Whether to shadow score the current request. Only draws a number."""
+        return random.random() < self.fraction
+
+    def submit(self, X, y_production: float) -> bool:
+        """
+        Queue a sampled request for shadow scoring. Never blocks.
+
+        Args
+        ----
+        - `X`: The (1, n_features) input of the request.
+        - `y_production` (float): The unrounded prediction served by
+        production.
+
+        Returns
+        -------
+        - `bool`: Whether the request was queued, False if the queue was full.
+
+        Example
+        -------
+        >>> if shadow.sample():
+        ...     shadow.submit(X, y_production)
+        """
+        try:
+            self._queue.put_nowait((X, y_production))
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+            return False
+        return True
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._score(batch)
+                    return
+                batch.append(item)
+            self._score(batch)
+
+    def _score(self, batch) -> None:
+        try:
+            X = np.vstack([X for X, _ in batch])
+            y_production = np.array([y for _, y in batch], dtype=np.float64)
+            y_candidate = self.candidate.predict(X)
+        except Exception:
+            with self._lock:
+                self._errors += len(batch)
+            return
+        diff = y_candidate - y_production
+        abs_diff = np.abs(diff)
+        with self._lock:
+            self._n += len(diff)
+            self._sum_diff += float(diff.sum())
+            self._sum_abs_diff += float(abs_diff.sum())
+            self._sum_sq_diff += float(np.square(diff).sum())
+            self._max_abs_diff = max(self._max_abs_diff, float(abs_diff.max()))
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        """
+        Divergence of the candidate (minus production) over the scored
+        requests, plus the number of sampled requests pending, dropped
+        because the queue was full, or failed.
+        """
+        with self._lock:
+            n = self._n
+            stats: Dict[str, Optional[float]] = {
+                "fraction": self.fraction,
+                "scored": n,
+                "pending": self._queue.qsize(),
+                "dropped": self._dropped,
+                "errors": self._errors,
+                "mean_diff": self._sum_diff / n if n else None,
+                "mean_abs_diff": self._sum_abs_diff / n if n else None,
+                "rmse": float(np.sqrt(self._sum_sq_diff / n)) if n else None,
+                "max_abs_diff": self._max_abs_diff if n else None,
+            }
+        return stats
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Score the pending requests and stop the worker thread."""
+        self._queue.put(None)
+        self._worker.join(timeout)
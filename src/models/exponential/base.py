@@ -1,10 +1,19 @@
+import warnings
+from typing import Optional
+
 import numpy as np
 from scipy.optimize import curve_fit
+from scipy.stats import norm
 from sklearn.base import BaseEstimator, RegressorMixin
 from sklearn.utils.validation import check_array, check_is_fitted, check_X_y
 
 from src.utils.decorators import delete_fitted_attributes_if_error
 
+# Defaults of `partial_fit`: weight of the previously seen samples relative to
+# the new ones, and number of previously seen samples kept
+DEFAULT_HISTORY_WEIGHT = 0.5
+DEFAULT_MAX_HISTORY = 50_000
+
 
 class ExponentialModel(BaseEstimator, RegressorMixin):
     def __init__(
@@ -13,11 +22,15 @@ class ExponentialModel(BaseEstimator, RegressorMixin):
         w1: float = 0.0,
         w2: float = 0.0,
         w3: float = 0.0,
+        n_bootstrap: int = 0,
+        random_state=None,
     ) -> None:
         self.w0 = w0
         self.w1 = w1
         self.w2 = w2
         self.w3 = w3
+        self.n_bootstrap = n_bootstrap
+        self.random_state = random_state
 
     @staticmethod
     def _model_func(x, w0, w1, w2, w3):
@@ -45,24 +58,254 @@ class ExponentialModel(BaseEstimator, RegressorMixin):
         )
         self.estimation_err_ = np.sqrt(np.diag(pcov))
         self.cond_ = np.linalg.cond(pcov)
+        self.residual_std_ = np.std(y - self._model_func(X, *self.best_params_))
+        if self.n_bootstrap > 0:
+            bootstrap_params = self._fit_bootstrap(X, y)
+            if bootstrap_params is not None:
+                self.bootstrap_params_ = bootstrap_params
         # Return the classifier
         return self
 
-    def predict(self, X):
+    def partial_fit(
+        self,
+        X,
+        y,
+        history_weight: float = DEFAULT_HISTORY_WEIGHT,
+        max_history: Optional[int] = DEFAULT_MAX_HISTORY,
+    ):
+        """
+        Update a fitted model with new samples, warm-starting `curve_fit` from
+        the current `best_params_` instead of searching from scratch.
+
+        `X` and `y` must only contain samples not seen before. The data seen
+        in previous fits (`X_`, `y_`) is kept as history, down weighted by
+        `history_weight` and limited to its last `max_history` rows (a
+        sliding window, None keeps all of them), so the model size and the
+        cost of each update stay bounded. The new samples are appended to the
+        history for the next update.
+        """
+        # Check if fit has been called
+        check_is_fitted(self)
+        if history_weight <= 0:
+            raise ValueError("history_weight must be positive")
+        X, y = check_X_y(X, y)
+        X_old, y_old = check_X_y(self.X_, self.y_)
+        if max_history is not None:
+            start = max(len(y_old) - max_history, 0)
+            X_old, y_old = X_old[start:], y_old[start:]
+        X_all = np.vstack([X_old, X])
+        y_all = np.concatenate([y_old, y])
+        # curve_fit weights each residual by 1 / sigma
+        sigma = np.concatenate(
+            [np.full(len(y_old), 1 / np.sqrt(history_weight)), np.ones(len(y))]
+        )
+        best_params, pcov = curve_fit(
+            self._model_func,
+            xdata=X_all,
+            ydata=y_all,
+            p0=self.best_params_,
+            sigma=sigma,
+            maxfev=10000,
+        )
+        # Only update the model once the refit has converged
+        self.best_params_ = best_params
+        self.X_ = X_all
+        self.y_ = y_all
+        self.estimation_err_ = np.sqrt(np.diag(pcov))
+        self.cond_ = np.linalg.cond(pcov)
+        self.residual_std_ = np.std(y_all - self._model_func(X_all, *best_params))
+        bootstrap_params = None
+        if getattr(self, "n_bootstrap", 0) > 0:
+            bootstrap_params = self._fit_bootstrap(X_all, y_all)
+        if bootstrap_params is not None:
+            self.bootstrap_params_ = bootstrap_params
+        elif hasattr(self, "bootstrap_params_"):
+            # The previous ensemble is centered on the old parameters
+            del self.bootstrap_params_
+        return self
+
+    def _fit_bootstrap(self, X, y):
+        """
+        Refit the model on `n_bootstrap` resamples of the training data,
+        warm-started from `best_params_`, and return the parameters of the
+        refits that converged as a (K, 4) array.
+
+        If less than two refits converge, a warning is raised and None is
+        returned, so the model is still usable for point predictions.
+        """
+        rng = np.random.default_rng(self.random_state)
+        params = []
+        for _ in range(self.n_bootstrap):
+            idx = rng.integers(0, len(y), size=len(y))
+            try:
+                popt, _ = curve_fit(
+                    self._model_func,
+                    xdata=X[idx],
+                    ydata=y[idx],
+                    p0=self.best_params_,
+                    maxfev=1000,
+                )
+            except RuntimeError:
+                continue
+            params.append(popt)
+        if len(params) < 2:
+            warnings.warn(
+                f"Only {len(params)} of {self.n_bootstrap} bootstrap refits"
+                " converged, prediction intervals will not be available",
+                RuntimeWarning,
+            )
+            return None
+        return np.array(params)
+
+    def predict(self, X, return_interval: bool = False, alpha: float = 0.1):
         # Check if fit has been called
         check_is_fitted(self)
         # Input validation
         X = check_array(X)
-        return self._model_func(X, *self.best_params_)
+        y_pred = self._model_func(X, *self.best_params_)
+        if not return_interval:
+            return y_pred
+        lower, upper = self._prediction_interval(X, y_pred, alpha)
+        return y_pred, lower, upper
+
+    def _prediction_interval(self, X, y_pred, alpha, chunk_size: int = 8192):
+        """
+        Compute the `1 - alpha` prediction interval around `y_pred`.
+
+        The variance of each prediction is the variance of the consumption
+        across the bootstrap ensemble, scaled by (distance * fuel_price)^2,
+        plus the residual variance seen during fit. The ensemble variance is
+        approximated with the delta method, gradient' @ cov @ gradient, so
+        its cost does not depend on the ensemble size nor on the number of
+        distinct distances. Since `w1` and `w3` only appear as
+        `w1 * exp(w3)`, the covariance is taken over (w0, w1 * exp(w3), w2),
+        which stays well conditioned.
+
+        The rows are processed in chunks of `chunk_size` through scratch
+        buffers that stay in cache, like in `predict_columns`.
+        """
+        if not 0 < alpha < 1:
+            raise ValueError("alpha must be between 0 and 1")
+        if not hasattr(self, "bootstrap_params_"):
+            raise ValueError(
+                "Prediction intervals need the model to be fitted with n_bootstrap > 0"
+            )
+        w0, w1, w2, w3 = self.bootstrap_params_.T
+        cov = np.cov(np.stack([w0, w1 * np.exp(w3), w2]), bias=True)
+        _, w1, w2, w3 = self.best_params_
+        scale = w1 * np.exp(w3)
+        z = norm.ppf(1 - alpha / 2)
+        residual_var = self.residual_std_**2
+
+        n_rows = len(X)
+        lower, upper = np.empty(n_rows), np.empty(n_rows)
+        size = min(chunk_size, n_rows)
+        grad_scale, grad_w2, variance = (np.empty(size) for _ in range(3))
+        for start in range(0, n_rows, chunk_size):
+            stop = min(start + chunk_size, n_rows)
+            m = stop - start
+            d, fp = X[start:stop, 0], X[start:stop, 2]
+            g1, g2, var, tmp = (
+                grad_scale[:m],
+                grad_w2[:m],
+                variance[:m],
+                lower[start:stop],
+            )
+            # Gradient of the consumption with respect to (w0, scale, w2):
+            # (1, g1, g2) = (1, exp(-w2 * d), -scale * d * exp(-w2 * d))
+            np.multiply(d, -w2, out=g1)
+            np.exp(g1, out=g1)
+            np.multiply(g1, d, out=g2)
+            g2 *= -scale
+            # var = cov00 + g1 (2 cov01 + cov11 g1) + g2 (2 cov02 + 2 cov12 g1
+            # + cov22 g2)
+            np.multiply(g1, cov[1, 1], out=var)
+            var += 2 * cov[0, 1]
+            var *= g1
+            var += cov[0, 0]
+            g1 *= 2 * cov[1, 2]
+            g1 += 2 * cov[0, 2]
+            np.multiply(g2, cov[2, 2], out=tmp)
+            tmp += g1
+            tmp *= g2
+            var += tmp
+            # Scale the consumption variance to the cost and add the noise
+            np.multiply(d, fp, out=g1)
+            g1 *= g1
+            var *= g1
+            var += residual_var
+            np.sqrt(var, out=var)
+            var *= z
+            np.subtract(y_pred[start:stop], var, out=lower[start:stop])
+            np.add(y_pred[start:stop], var, out=upper[start:stop])
+        return lower, upper
+
+    def predict_columns(
+        self,
+        distance,
+        fuel_price,
+        out=None,
+        dtype=np.float64,
+        chunk_size: int = 65536,
+    ):
+        """
+        Predict from separate distance and fuel price columns, for large
+        scoring jobs.
+
+        The columns can be any 1-D arrays, e.g. `df["distancia"].to_numpy()`
+        or `X[:, 0]` of a column-major `X`, and are read in place. They are
+        processed in chunks of `chunk_size` rows through a single scratch
+        buffer, so the only full-size allocation is `out` (which can also be
+        passed preallocated). With `dtype=np.float32`, the computation is done
+        in single precision, halving the memory traffic.
+        """
+        # Check if fit has been called
+        check_is_fitted(self)
+        distance = np.asarray(distance)
+        fuel_price = np.asarray(fuel_price)
+        if distance.ndim != 1 or distance.shape != fuel_price.shape:
+            raise ValueError("distance and fuel_price must be 1-D of the same length")
+        if out is None:
+            out = np.empty(len(distance), dtype=dtype)
+        elif out.shape != distance.shape:
+            raise ValueError("out must have the same length as distance")
+        dtype = out.dtype
+        w0, w1, w2, w3 = self.best_params_.astype(dtype)
+        # w1 * exp(-w2 * d + w3) == (w1 * exp(w3)) * exp(-w2 * d)
+        scale = w1 * np.exp(w3)
+        buffer = np.empty(min(chunk_size, len(distance)), dtype=dtype)
+        for start in range(0, len(distance), chunk_size):
+            stop = min(start + chunk_size, len(distance))
+            d = distance[start:stop]
+            tmp = buffer[: stop - start]
+            np.multiply(d, -w2, out=tmp, dtype=dtype)
+            np.exp(tmp, out=tmp)
+            tmp *= scale
+            tmp += w0
+            np.multiply(tmp, d, out=tmp, dtype=dtype)
+            np.multiply(tmp, fuel_price[start:stop], out=out[start:stop], dtype=dtype)
+        return out
 
     def predict_endpoint(
-        self, distance: float, mileage: float, fuel_price: float, precision: int = 3
-    ) -> float:
+        self,
+        distance: float,
+        mileage: float,
+        fuel_price: float,
+        precision: Optional[int] = 3,
+        return_interval: bool = False,
+        alpha: float = 0.1,
+    ):
         # Check if fit has been called
         check_is_fitted(self)
         X = np.array([[distance, mileage, fuel_price]], dtype=np.float64)
         # Input validation
         X = check_array(X)
-        return round(
-            number=float(self._model_func(X, *self.best_params_)), ndigits=precision
-        )
+        # `precision=None` returns the unrounded values
+        if not return_interval:
+            value = float(self._model_func(X, *self.best_params_)[0])
+            return value if precision is None else round(value, precision)
+        y_pred, lower, upper = self.predict(X, return_interval=True, alpha=alpha)
+        values = tuple(float(value[0]) for value in (y_pred, lower, upper))
+        if precision is None:
+            return values
+        return tuple(round(value, precision) for value in values)
@@ -0,0 +1,124 @@
+from typing import Optional, Sequence
+
+import numpy as np
+from joblib import Parallel, delayed
+from scipy.optimize import curve_fit
+from sklearn.base import BaseEstimator, RegressorMixin
+from sklearn.utils.validation import check_array, check_is_fitted, check_X_y
+
+from src.models.exponential.base import ExponentialModel
+from src.utils.decorators import delete_fitted_attributes_if_error
+
+
+def _fit_segment(X, y, starts):
+    """
+    Fit the curve of one segment from every initial guess in `starts` and
+    return the parameters with the lowest squared error, or `None` if no fit
+    converged. `curve_fit` sometimes drifts into a flat curve (`w3` -> -inf),
+    so a second starting point makes the segment fits much more reliable.
+    """
+    best, best_sse = None, np.inf
+    for p0 in starts:
+        try:
+            popt, _ = curve_fit(
+                ExponentialModel._model_func, xdata=X, ydata=y, p0=p0, maxfev=10000
+            )
+        except RuntimeError:
+            continue
+        sse = np.sum((ExponentialModel._model_func(X, *popt) - y) ** 2)
+        if sse < best_sse:
+            best, best_sse = popt, sse
+    return best
+
+
+class GroupedExponentialModel(BaseEstimator, RegressorMixin):
+    """
+    One `ExponentialModel` curve per segment (vehicle, mileage band...), with
+    all the parameters stored in a single (S + 1, 4) array.
+
+    Segments are either given explicitly to `fit` and `predict` (e.g. one id
+    per vehicle), or derived from the mileage column by `mileage_bins`.
+    Every segment curve is fitted both from the `w0`...`w3` initial guess and
+    warm-started from the global curve fitted on all the data, keeping the
+    best of the two. Segments with less than `min_samples` rows, whose fit
+    does not converge, or unseen during fit, use the global parameters stored
+    in the last row of `params_`.
+
+    Fitted attributes
+    -----------------
+    - `segments_`: Sorted array with the S segment keys seen during fit.
+    - `params_`: (S + 1, 4) array, where row `i` holds the parameters of
+    `segments_[i]` and the last row the global parameters.
+    - `n_samples_`: Number of training rows of each segment.
+    """
+
+    def __init__(
+        self,
+        w0: float = 0.0,
+        w1: float = 0.0,
+        w2: float = 0.0,
+        w3: float = 0.0,
+        mileage_bins: Optional[Sequence[float]] = None,
+        min_samples: int = 50,
+        n_jobs: Optional[int] = None,
+    ) -> None:
+        self.w0 = w0
+        self.w1 = w1
+        self.w2 = w2
+        self.w3 = w3
+        self.mileage_bins = mileage_bins
+        self.min_samples = min_samples
+        self.n_jobs = n_jobs
+
+    def _segment_keys(self, X, segments):
+        if segments is not None:
+            segments = np.asarray(segments)
+            if len(segments) != len(X):
+                raise ValueError("segments must have one entry per row of X")
+            return segments
+        if self.mileage_bins is None:
+            raise ValueError("Either pass segments or set mileage_bins")
+        return np.digitize(X[:, 1], self.mileage_bins)
+
+    @delete_fitted_attributes_if_error
+    def fit(self, X, y, segments=None):
+        # Store the data seen during fit
+        self.X_ = X
+        self.y_ = y
+        # Check that X and y have correct shape
+        X, y = check_X_y(X, y)
+        keys = self._segment_keys(X, segments)
+        p0 = [self.w0, self.w1, self.w2, self.w3]
+        global_params = ExponentialModel(*p0).fit(X, y).best_params_
+
+        self.segments_, inverse, self.n_samples_ = np.unique(
+            keys, return_inverse=True, return_counts=True
+        )
+        # Row indices of every segment, as contiguous slices of a single sort
+        order = np.argsort(inverse, kind="stable")
+        rows = np.split(order, np.cumsum(self.n_samples_)[:-1])
+        to_fit = np.flatnonzero(self.n_samples_ >= self.min_samples)
+        fitted = Parallel(n_jobs=self.n_jobs)(
+            delayed(_fit_segment)(X[rows[i]], y[rows[i]], [p0, global_params])
+            for i in to_fit
+        )
+
+        self.params_ = np.tile(global_params, (len(self.segments_) + 1, 1))
+        for i, popt in zip(to_fit, fitted):
+            if popt is not None:
+                self.params_[i] = popt
+        # Return the classifier
+        return self
+
+    def predict(self, X, segments=None):
+        # Check if fit has been called
+        check_is_fitted(self)
+        # Input validation
+        X = check_array(X)
+        keys = self._segment_keys(X, segments)
+        # Position of each key in the parameter table, or the global last row
+        idx = np.searchsorted(self.segments_, keys)
+        idx[idx == len(self.segments_)] = 0
+        idx[self.segments_[idx] != keys] = len(self.segments_)
+        # Gather one (N, 4) parameter row per sample and evaluate them at once
+        return ExponentialModel._model_func(X, *self.params_[idx].T)
@@ -4,17 +4,24 @@ import getpass
 import logging
 import os
 import platform
-from typing import Dict
+from typing import Dict, List
 
 import mlflow.sklearn
 import numpy as np
 from hyperopt import STATUS_OK, Trials, fmin, hp, tpe
 from sklearn.metrics import make_scorer, mean_squared_error, r2_score
-from sklearn.model_selection import cross_val_score
+from sklearn.model_selection import cross_validate
 
 import mlflow
-from src.models.exponential.base import ExponentialModel
+from src.data.validation import validate
+from src.models.exponential.base import (
+    DEFAULT_HISTORY_WEIGHT,
+    DEFAULT_MAX_HISTORY,
+    ExponentialModel,
+)
 from src.models.exponential.preprocessing import ColumnDropperTransformer
+from src.utils.artifacts import log_dataset, save_and_log_model
+from src.utils.profiling import StageProfiler
 from src.utils.read import (
     get_folder_permissions,
     get_owner_and_group_ids,
@@ -23,6 +30,13 @@ from src.utils.read import (
 )
 from src.utils.split import split_X_y_df
 
+# Accuracy a model must reach on the validation dataset to be promoted
+MIN_R2 = 0.9
+MAX_MSE = 0.4
+MAX_ABSOLUTE_ERROR = 5
+# Fraction of rows rejected by the data validation above which training fails
+MAX_REJECTED_FRACTION = 0.05
+
 
 def setup_logger() -> logging.Logger:
     # Set up logger
@@ -87,23 +101,166 @@ def parse_args() -> argparse.Namespace:
         help="The MLFlow tracking uri",
     )
 
+    parser.add_argument(
+        "-p",
+        "--profile",
+        nargs="?",
+        const="stages",
+        choices=["stages", "cprofile"],
+        default=None,
+        required=False,
+        help=(
+            "Log the time spent in each stage as MLflow metrics. With 'cprofile',"
+            " also log a cProfile report of the stages as an artifact."
+            " Default: disabled"
+        ),
+    )
+
+    parser.add_argument(
+        "-b",
+        "--bootstrap",
+        type=int,
+        default=50,
+        required=False,
+        help=(
+            "Number of bootstrap refits of the model, used for the prediction"
+            " intervals, also in incremental mode. 0 disables the intervals and"
+            " makes training faster. Default: 50"
+        ),
+    )
+
+    parser.add_argument(
+        "--max-rejected",
+        type=float,
+        default=MAX_REJECTED_FRACTION,
+        required=False,
+        help=(
+            "Maximum fraction of the train or test rows that the data validation"
+            f" can reject before training is aborted. Default: {MAX_REJECTED_FRACTION}"
+        ),
+    )
+
+    parser.add_argument(
+        "-i",
+        "--incremental",
+        action="store_true",
+        help=(
+            "Update the deployed model with the --new-data trips, warm-starting"
+            " from its parameters instead of running the hyperparameter search."
+            " The model is only promoted if it passes the accuracy checks"
+        ),
+    )
+
+    parser.add_argument(
+        "--new-data",
+        type=str,
+        required=False,
+        help=(
+            "Path of the dataset with only the trips not yet seen by the deployed"
+            " model, used instead of the training dataset in incremental mode."
+            " Required with --incremental"
+        ),
+    )
+
+    parser.add_argument(
+        "--model-path",
+        type=str,
+        default="model",
+        required=False,
+        help="Where the deployed model is loaded from and saved to. Default: model",
+    )
+
+    parser.add_argument(
+        "--history-weight",
+        type=float,
+        default=DEFAULT_HISTORY_WEIGHT,
+        required=False,
+        help=(
+            "Weight of the previously seen samples relative to the new ones in"
+            f" incremental mode. Default: {DEFAULT_HISTORY_WEIGHT}"
+        ),
+    )
+
+    parser.add_argument(
+        "--max-history",
+        type=int,
+        default=DEFAULT_MAX_HISTORY,
+        required=False,
+        help=(
+            "Number of most recent previously seen samples kept in incremental"
+            f" mode. Default: {DEFAULT_MAX_HISTORY}"
+        ),
+    )
+
     args = parser.parse_args()
+    if args.incremental and not args.new_data:
+        parser.error("--new-data is required with --incremental")
     return args
 
 
+def check_accuracy(mse: float, r2: float, maximum_error: float) -> List[str]:
+    """
+    Check the validation metrics of a model against the promotion thresholds.
+
+    Returns
+    -------
+    - `List[str]`: A description of every failed check, empty if the model
+    can be promoted.
+    """
+    failures = []
+    if not r2 > MIN_R2:
+        failures.append(f"r2 {r2:.4f} is not above {MIN_R2}")
+    if not mse < MAX_MSE:
+        failures.append(f"MSE {mse:.4f} is not below {MAX_MSE}")
+    if not maximum_error < MAX_ABSOLUTE_ERROR:
+        failures.append(
+            f"maximum error {maximum_error:.4f} is not below {MAX_ABSOLUTE_ERROR}"
+        )
+    return failures
+
+
+def check_rejected(
+    dataset: str, valid: np.ndarray, rejected: Dict[str, int], max_fraction: float
+) -> None:
+    """
+    Fail if the validation rejected more than `max_fraction` of the rows of a
+    dataset, which rather points to a wrong rule (e.g. a `cost_consistency`
+    tolerance below the rounding of the export) than to bad trips.
+
+    Raises
+    ------
+    - `ValueError`: If too many rows were rejected, with the count per rule.
+    """
+    n_rows = len(valid)
+    n_rejected = n_rows - np.count_nonzero(valid)
+    if n_rejected > max_fraction * n_rows:
+        raise ValueError(
+            f"Validation rejected {n_rejected / n_rows:.1%} of the {dataset} rows,"
+            f" more than the {max_fraction:.1%} allowed."
+            f" Rejected rows per rule: {rejected}"
+        )
+
+
 def hyperparameter_optimization(model, X_train, y_train, max_evals=1000):
     scorer = make_scorer(score_func=mean_squared_error, greater_is_better=False)
 
     def objective(params: Dict) -> Dict:
         estimator = model(**params)
-        score = cross_val_score(
+        scores = cross_validate(
             estimator=estimator,
             X=X_train,
             y=y_train,
             scoring=scorer,
             n_jobs=-1,
-        ).mean()
-        return {"loss": -score, "status": STATUS_OK}
+        )
+        # The folds run in parallel, so the slowest one is what the trial waits
+        # for. The rest of the trial time is cross-validation overhead.
+        return {
+            "loss": -scores["test_score"].mean(),
+            "status": STATUS_OK,
+            "fit_time": scores["fit_time"].max(),
+            "score_time": scores["score_time"].max(),
+        }
 
     space = {
         "w0": hp.uniform("w0", 0, 10),
@@ -131,42 +288,118 @@ def main():
     logger.debug(f"Current host: {platform.node()}")
     args = parse_args()
     logger.debug(f"Input arguments: {args}")
-    train = read_parquet_or_csv(path=join_path(args.data, args.train_name, sep="/"))
-    test = read_parquet_or_csv(path=join_path(args.data, args.validation_name, sep="/"))
+    profiler = StageProfiler(
+        enabled=args.profile is not None, cprofile=args.profile == "cprofile"
+    )
+    # The deployed model already saw the training dataset, so it is only
+    # updated with the new trips
+    train_path = (
+        args.new_data
+        if args.incremental
+        else join_path(args.data, args.train_name, sep="/")
+    )
+    with profiler.stage("load_data"):
+        train = read_parquet_or_csv(path=train_path)
+        test = read_parquet_or_csv(
+            path=join_path(args.data, args.validation_name, sep="/")
+        )
     logger.debug(f"Train dataset size: {len(train)}\nTest dataset size: {len(test)}")
+    with profiler.stage("validation"):
+        train_valid, train_rejected = validate(train)
+        test_valid, test_rejected = validate(test)
+        train = train[train_valid]
+        test = test[test_valid]
+    logger.debug(f"Train rows rejected by validation: {train_rejected}")
+    logger.debug(f"Test rows rejected by validation: {test_rejected}")
+    check_rejected("train", train_valid, train_rejected, args.max_rejected)
+    check_rejected("test", test_valid, test_rejected, args.max_rejected)
     logger.debug("Preprocessing data...")
-    dropper = ColumnDropperTransformer(columns=["consumo_medio"])
-    train = dropper.transform(train)
-    test = dropper.transform(test)
+    with profiler.stage("preprocessing"):
+        dropper = ColumnDropperTransformer(columns=["consumo_medio"])
+        train = dropper.transform(train)
+        test = dropper.transform(test)
 
-    X_train, y_train, X_test, y_test = split_X_y_df(
-        train=train, test=test, target=TARGET_FIELD
-    )
+        X_train, y_train, X_test, y_test = split_X_y_df(
+            train=train, test=test, target=TARGET_FIELD
+        )
     if args.mlflow_tracking:
         mlflow.set_tracking_uri(args.mlflow_tracking)
-    with mlflow.start_run() as run:  # noqa: F841
-        best, trials = hyperparameter_optimization(
-            model=ExponentialModel, X_train=X_train, y_train=y_train
-        )
-        model = ExponentialModel(**best)
-        model.fit(X_train, y_train)
-        y_pred = model.predict(X_test)
-        scoring = mean_squared_error(y_true=y_test, y_pred=y_pred)
-        r2 = r2_score(y_true=y_test, y_pred=y_pred)
-        maximum_error = np.max(np.abs(y_pred - y_test))
+    with mlflow.start_run():
+        if args.incremental:
+            with profiler.stage("fit"):
+                model = mlflow.sklearn.load_model(model_uri=args.model_path)
+                model.set_params(n_bootstrap=args.bootstrap)
+                model.partial_fit(
+                    X_train,
+                    y_train,
+                    history_weight=args.history_weight,
+                    max_history=args.max_history,
+                )
+        else:
+            with profiler.stage("hyperparameter_optimization"):
+                best, trials = hyperparameter_optimization(
+                    model=ExponentialModel, X_train=X_train, y_train=y_train
+                )
+            # Time spent in curve_fit and scoring by the cross-validation
+            # workers, which the hyperparameter_optimization stage only sees as
+            # a whole
+            profiler.record(
+                "hyperopt_fit", sum(result["fit_time"] for result in trials.results)
+            )
+            profiler.record(
+                "hyperopt_score",
+                sum(result["score_time"] for result in trials.results),
+            )
+            with profiler.stage("fit"):
+                model = ExponentialModel(
+                    **best, n_bootstrap=args.bootstrap, random_state=42
+                )
+                model.fit(X_train, y_train)
+        with profiler.stage("evaluation"):
+            y_pred = model.predict(X_test)
+            scoring = mean_squared_error(y_true=y_test, y_pred=y_pred)
+            r2 = r2_score(y_true=y_test, y_pred=y_pred)
+            maximum_error = np.max(np.abs(y_pred - y_test))
+        failures = check_accuracy(mse=scoring, r2=r2, maximum_error=maximum_error)
+        # Full retrains are promoted unconditionally, incremental updates must
+        # pass the accuracy checks
+        promote = not (args.incremental and failures)
+        for failure in failures:
+            logger.warning(f"Accuracy check failed: {failure}")
         logger.debug(f"Data folder permissions: {get_folder_permissions('data')}")
         logger.debug(f"Data folder owner: {get_owner_and_group_ids('data')}")
-        mlflow.log_artifact("data")
+        with profiler.stage("log_data"):
+            data_bytes = log_dataset("data")
+            if args.incremental:
+                # The trips that changed the model, besides the unchanged data
+                data_bytes += log_dataset(
+                    args.new_data, artifact_path="new_data", name="new_data"
+                )
         mlflow.log_param("best_params", model.best_params_)
         mlflow.log_param("estimation_err", model.estimation_err_)
         mlflow.log_param("condition_number", model.cond_)
+        mlflow.log_param("n_bootstrap", args.bootstrap)
         mlflow.log_metric("MSE", scoring)
         mlflow.log_metric("r2", r2)
         mlflow.log_metric("maximum_error", maximum_error)
-        mlflow.sklearn.log_model(sk_model=model, artifact_path="model")
-        mlflow.artifacts.download_artifacts(
-            artifact_uri=run.info.artifact_uri + "/model/", dst_path="model/"
-        )
+        for rule, n_rejected in train_rejected.items():
+            mlflow.log_metric(f"rejected_train_{rule}", n_rejected)
+        for rule, n_rejected in test_rejected.items():
+            mlflow.log_metric(f"rejected_test_{rule}", n_rejected)
+        mlflow.set_tag("incremental", args.incremental)
+        mlflow.set_tag("promoted", promote)
+        if promote:
+            with profiler.stage("log_model"):
+                model_bytes = save_and_log_model(model, path=args.model_path)
+        else:
+            logger.warning("The model was not promoted")
+            model_bytes = 0
+        mlflow.log_metric("bytes_uploaded_data", data_bytes)
+        mlflow.log_metric("bytes_uploaded_model", model_bytes)
+        mlflow.log_metric("bytes_uploaded", data_bytes + model_bytes)
+        if args.profile:
+            logger.debug(f"Stage timings: {profiler.timings}")
+            profiler.log_to_mlflow()
     logger.info("Training completed!")
 
 
@@ -0,0 +1,141 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+import mlflow.sklearn
+
+import mlflow
+
+DATASET_HASH_TAG = "dataset_hash"
+DATASET_URI_TAG = "dataset_uri"
+
+
+def _list_files(path: Path) -> List[Path]:
+    if path.is_dir():
+        return [p for p in path.rglob("*") if p.is_file()]
+    return [path]
+
+
+def hash_directory(
+    path: Union[str, Path], block_size: int = 1 << 20
+) -> Tuple[str, int]:
+    """
+    Compute a content hash of every file inside a directory.
+
+    Args
+    ----
+    - `path` (str or pathlib.Path): The directory to hash. A single file
+    is also accepted.
+    - `block_size` (int): Number of bytes read at once, so that large files
+    are hashed with constant memory.
+
+    Returns
+    -------
+    - `Tuple[str, int]`: The SHA-256 hex digest and the total size in bytes
+    of the files. The digest covers both the relative file paths and their
+    contents, so renaming a file changes it.
+    """
+    root = Path(path)
+    files = sorted(_list_files(root))
+    digest = hashlib.sha256()
+    n_bytes = 0
+    for file in files:
+        name = file.relative_to(root).as_posix() if root.is_dir() else root.name
+        digest.update(name.encode() + b"\0")
+        with open(file, "rb") as f:
+            while block := f.read(block_size):
+                digest.update(block)
+                n_bytes += len(block)
+    return digest.hexdigest(), n_bytes
+
+
+def log_dataset(
+    path: Union[str, Path],
+    artifact_path: Optional[str] = None,
+    name: str = "dataset",
+) -> int:
+    """
+    Log a dataset to the active MLflow run, uploading it only if no previous
+    run already logged a dataset with the same content.
+
+    The content hash is stored in the `<name>_hash` tag of the run (by
+    default `dataset_hash`), and the location of the uploaded files in the
+    `<name>_uri` tag. When a run with the same `<name>_hash` exists, its
+    `<name>_uri` is reused as a reference instead of uploading the files
+    again.
+
+    Args
+    ----
+    - `path` (str or pathlib.Path): The local dataset file or directory.
+    - `artifact_path` (str, optional): The folder inside the run artifacts
+    where the dataset is uploaded, if needed. By default it is uploaded at
+    the root, so a `data` directory is stored as the `data` artifact.
+    - `name` (str): Prefix of the tags, so that several datasets can be
+    logged to the same run.
+
+    Returns
+    -------
+    - `int`: The number of bytes uploaded, 0 if the dataset was deduplicated.
+    """
+    hash_tag, uri_tag = f"{name}_hash", f"{name}_uri"
+    digest, n_bytes = hash_directory(path)
+    previous = mlflow.search_runs(
+        filter_string=f"tags.{hash_tag} = '{digest}'",
+        max_results=1,
+        output_format="list",
+        search_all_experiments=True,
+    )
+    if previous and uri_tag in previous[0].data.tags:
+        dataset_uri = previous[0].data.tags[uri_tag]
+        n_bytes = 0
+    else:
+        mlflow.log_artifact(str(path), artifact_path=artifact_path)
+        basename = Path(path).name
+        dataset_uri = mlflow.get_artifact_uri(
+            f"{artifact_path}/{basename}" if artifact_path else basename
+        )
+    mlflow.set_tags({hash_tag: digest, uri_tag: dataset_uri})
+    return n_bytes
+
+
+def save_and_log_model(
+    model, path: Union[str, Path], artifact_path: str = "model"
+) -> int:
+    """
+    Save a scikit-learn model in MLflow format to a local directory and upload
+    that directory to the active MLflow run.
+
+    The model is first saved into a temporary directory next to `path`, which
+    then replaces `path`, so a failed save never leaves a half-written model.
+
+    Args
+    ----
+    - `model`: The fitted scikit-learn estimator.
+    - `path` (str or pathlib.Path): The local directory of the model. Any
+    previous content is replaced.
+    - `artifact_path` (str): Where to upload the model inside the run
+    artifacts.
+
+    Returns
+    -------
+    - `int`: The number of bytes uploaded.
+    """
+    target = Path(path).resolve()
+    target.parent.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(dir=target.parent, prefix=f".{target.name}-"))
+    try:
+        mlflow.sklearn.save_model(
+            sk_model=model,
+            path=str(staging / target.name),
+            serialization_format=mlflow.sklearn.SERIALIZATION_FORMAT_CLOUDPICKLE,
+        )
+        if target.exists():
+            shutil.rmtree(target)
+        os.replace(staging / target.name, target)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    mlflow.log_artifacts(str(target), artifact_path=artifact_path)
+    return sum(file.stat().st_size for file in _list_files(target))
@@ -3,9 +3,9 @@ from functools import wraps
 
 def delete_fitted_attributes_if_error(func):
     @wraps(func)
-    def wrapper(self, X, y):
+    def wrapper(self, X, y, *args, **kwargs):
         try:
-            return func(self, X, y)
+            return func(self, X, y, *args, **kwargs)
         except Exception:
             if hasattr(self, "X_"):
                 del self.X_
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+import mlflow
+from src.models.exponential.base import ExponentialModel
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--runslow", action="store_true", default=False, help="Run the slow tests"
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "slow: timing-dependent load tests, only run with --runslow"
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--runslow"):
+        return
+    skip_slow = pytest.mark.skip(reason="Needs --runslow to run")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip_slow)
+
+
+@pytest.fixture
+def mlflow_tracking(tmp_path, monkeypatch):
+    # Keep the tracking database and the artifacts inside the test directory
+    monkeypatch.chdir(tmp_path)
+    mlflow.set_tracking_uri(f"sqlite:///{tmp_path / 'mlflow.db'}")
+    yield tmp_path
+    mlflow.set_tracking_uri(None)
+
+
+@pytest.fixture
+def toy_X():
+    return np.array([[1.0, 0.0, 1.5], [10.0, 0.0, 1.6], [50.0, 0.0, 1.4]] * 5)
+
+
+@pytest.fixture
+def fit_toy_model(toy_X):
+    """Factory of `ExponentialModel`s fitted on noiseless toy trips"""
+
+    def fit(w0: float = 0.05) -> ExponentialModel:
+        model = ExponentialModel(w0=w0, w1=0.05, w2=0.1)
+        return model.fit(toy_X, ExponentialModel._model_func(toy_X, w0, 0.05, 0.1, 0))
+
+    return fit
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.synthetic import (
+    DEFAULT_PARAMS,
+    PARQUET_SCHEMA,
+    generate_trips,
+    write_parquet_dataset,
+    write_raw_csv,
+)
+from src.models.exponential.base import ExponentialModel
+
+
+def test_generate_trips_chunks():
+    chunks = list(generate_trips(n_rows=2500, chunk_size=1000))
+    assert [len(chunk) for chunk in chunks] == [1000, 1000, 500]
+    df = pd.concat(chunks)
+    assert (df.distancia > 0).all()
+    assert (df.coste > 0).all()
+    np.testing.assert_allclose(
+        df.consumo_medio * df.distancia * df.precio_carburante, df.coste
+    )
+    X = df[["distancia", "kilometraje", "precio_carburante"]].to_numpy()
+    expected = ExponentialModel._model_func(X, *DEFAULT_PARAMS)
+    assert np.median(np.abs(df.coste - expected) / expected) < 0.05
+
+
+def test_generate_trips_invalid_arguments():
+    with pytest.raises(ValueError):
+        next(generate_trips(n_rows=10, chunk_size=0))
+
+
+def test_write_parquet_dataset(tmp_path):
+    path = str(tmp_path / "dataset")
+    n_rows = write_parquet_dataset(generate_trips(n_rows=3000, chunk_size=1000), path)
+    df = pd.read_parquet(path)
+    assert n_rows == len(df) == 3000
+    assert set(df.columns) == set(PARQUET_SCHEMA.names)
+    assert (tmp_path / "dataset" / "year=2022").is_dir()
+    # All the chunks fit in a single write, so one file per partition
+    files = list((tmp_path / "dataset").rglob("*.parquet"))
+    assert len(files) == len({file.parent for file in files})
+
+    with pytest.raises(FileExistsError):
+        write_parquet_dataset(generate_trips(n_rows=10), path)
+
+
+def test_write_parquet_dataset_rows_per_write(tmp_path):
+    path = str(tmp_path / "dataset")
+    chunks = generate_trips(n_rows=3000, chunk_size=500)
+    assert write_parquet_dataset(chunks, path, rows_per_write=1000) == 3000
+    files = list((tmp_path / "dataset" / "year=2022" / "month=1").glob("*.parquet"))
+    assert len(files) == 3
+    assert len(pd.read_parquet(path)) == 3000
+
+
+def test_write_raw_csv(tmp_path):
+    path = str(tmp_path / "raw.csv")
+    n_rows = write_raw_csv(generate_trips(n_rows=3000, chunk_size=1000), path)
+    # Same options as the processing Lambda
+    df = pd.read_csv(
+        path,
+        sep=";",
+        decimal=",",
+        thousands=".",
+        parse_dates=["fecha"],
+        dayfirst=True,
+    )
+    assert n_rows == len(df) == 3000
+    assert df["fecha"].dtype.kind == "M"
+    assert df["consumo medio (l/100km)"].between(1, 50).all()
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.synthetic import generate_trips
+from src.data.validation import COST_CONSISTENCY, validate
+
+
+@pytest.fixture
+def trips():
+    df = pd.concat(generate_trips(n_rows=5000))
+    return df[
+        ["distancia", "kilometraje", "consumo_medio", "precio_carburante", "coste"]
+    ]
+
+
+def test_validate_accepts_clean_data(trips):
+    valid, rejected = validate(trips)
+    assert valid.all()
+    assert set(rejected.values()) == {0}
+    assert COST_CONSISTENCY in rejected
+
+
+def test_validate_rejects_bad_rows(trips):
+    trips = trips.copy()
+    trips.iloc[0, trips.columns.get_loc("precio_carburante")] = 0.0
+    trips.iloc[1, trips.columns.get_loc("coste")] = 1e6
+    trips.iloc[2, trips.columns.get_loc("coste")] *= 3
+    trips.iloc[3, trips.columns.get_loc("distancia")] = np.nan
+
+    valid, rejected = validate(trips, chunk_size=3)
+    np.testing.assert_array_equal(np.flatnonzero(~valid), [0, 1, 2, 3])
+    assert rejected["fuel_price_range"] == 1
+    assert rejected["cost_range"] == 1
+    assert rejected["distance_range"] == 1
+    assert rejected[COST_CONSISTENCY] == 4
+
+
+def test_validate_skips_missing_columns(trips):
+    with pytest.raises(ValueError):
+        validate({"other": [1.0]})
+    valid, rejected = validate(trips.drop(columns=["consumo_medio", "coste"]))
+    assert valid.all()
+    assert set(rejected) == {"distance_range", "mileage_range", "fuel_price_range"}
+    valid, _ = validate({"precio_carburante": np.array([0.0, 1.5])})
+    np.testing.assert_array_equal(valid, [False, True])
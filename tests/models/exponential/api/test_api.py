@@ -0,0 +1,105 @@
+import time
+
+import numpy as np
+import pytest
+
+import mlflow
+from src.models.exponential.api.api import app
+from src.models.exponential.api.shadow import ShadowScorer
+from src.models.exponential.base import ExponentialModel
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch, fit_toy_model):
+    monkeypatch.chdir(tmp_path)
+    mlflow.sklearn.save_model(
+        fit_toy_model(w0=0.05),
+        path="model",
+        serialization_format=mlflow.sklearn.SERIALIZATION_FORMAT_CLOUDPICKLE,
+    )
+    app.config["TESTING"] = True
+    yield app.test_client()
+    app.config["SHADOW"] = None
+
+
+def _post(client):
+    return client.post("/", data={"distance": "12.5", "fuel_price": "1.6"})
+
+
+def test_shadow_endpoint_without_candidate(client):
+    assert _post(client).status_code == 200
+    assert client.get("/shadow").status_code == 404
+
+
+def test_shadow_scoring(client, fit_toy_model):
+    shadow = ShadowScorer(fit_toy_model(w0=0.06), fraction=1.0)
+    app.config["SHADOW"] = shadow
+    for _ in range(20):
+        assert _post(client).status_code == 200
+    shadow.close(timeout=10)
+
+    stats = client.get("/shadow").get_json()
+    assert stats["scored"] == 20
+    assert stats["dropped"] == stats["errors"] == 0
+    # The candidate consumes 0.01 l/km more: 0.01 * 12.5 km * 1.6 EUR/l
+    assert stats["mean_diff"] == pytest.approx(0.2)
+    assert stats["max_abs_diff"] == pytest.approx(0.2)
+
+
+def test_shadow_scorer_never_blocks(toy_X, fit_toy_model):
+    shadow = ShadowScorer(fit_toy_model(w0=0.06), fraction=1.0, max_queue=1)
+    shadow.candidate = None  # Make the worker fail on every batch
+    queued = sum(shadow.submit(toy_X[:1], 0.5) for _ in range(1000))
+    shadow.close(timeout=10)
+    stats = shadow.stats()
+    assert queued + stats["dropped"] == 1000
+    assert stats["errors"] == queued
+    assert stats["scored"] == 0
+
+
+def test_unsampled_requests_do_no_model_work(client, fit_toy_model, monkeypatch):
+    shadow = ShadowScorer(fit_toy_model(w0=0.06), fraction=0.0)
+    app.config["SHADOW"] = shadow
+    calls = {"production": 0, "candidate": 0, "submit": 0}
+    model_func = ExponentialModel._model_func
+
+    def counting_model_func(*args):
+        calls["production"] += 1
+        return model_func(*args)
+
+    def counting(name):
+        def count(*args, **kwargs):
+            calls[name] += 1
+
+        return count
+
+    monkeypatch.setattr(
+        ExponentialModel, "_model_func", staticmethod(counting_model_func)
+    )
+    monkeypatch.setattr(shadow.candidate, "predict", counting("candidate"))
+    monkeypatch.setattr(shadow, "submit", counting("submit"))
+    for _ in range(20):
+        assert _post(client).status_code == 200
+    shadow.close(timeout=10)
+    # A single production prediction per request, and nothing else
+    assert calls == {"production": 20, "candidate": 0, "submit": 0}
+
+
+@pytest.mark.slow
+def test_shadow_hook_latency(fit_toy_model, toy_X):
+    """
+    Load test of what the shadow scoring adds to the request path, with every
+    request sampled while the worker scores them. Wall-clock based, so it is
+    skipped unless run with `--runslow`.
+    """
+    shadow = ShadowScorer(fit_toy_model(w0=0.06), fraction=1.0)
+    latencies = []
+    for _ in range(5000):
+        start = time.perf_counter()
+        if shadow.sample():
+            shadow.submit(toy_X[:1], 0.5)
+        latencies.append(time.perf_counter() - start)
+    shadow.close(timeout=10)
+    assert shadow.stats()["scored"] > 0
+    # Against a p99 of about 2 ms per request
+    assert np.percentile(latencies, 99) < 50e-6
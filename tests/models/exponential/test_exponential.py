@@ -1,10 +1,19 @@
+import time
+
 import numpy as np
+import pandas as pd
 import pytest
 from sklearn.metrics import mean_squared_error, r2_score
 
+from src.data.synthetic import generate_trips
+from src.models.exponential import base
 from src.models.exponential.base import ExponentialModel
 from src.models.exponential.preprocessing import ColumnDropperTransformer
-from src.models.exponential.train import hyperparameter_optimization
+from src.models.exponential.train import (
+    check_accuracy,
+    check_rejected,
+    hyperparameter_optimization,
+)
 from src.utils.read import join_path, read_parquet_or_csv
 from src.utils.split import split_X_y_df
 
@@ -22,6 +31,15 @@ def train_test():
     return X_train, y_train, X_test, y_test
 
 
+@pytest.fixture
+def synthetic_train_test():
+    df = pd.concat(generate_trips(n_rows=6000))
+    df = df[df.distancia > 1]
+    X = df[["distancia", "kilometraje", "precio_carburante"]].to_numpy()
+    y = df["coste"].to_numpy()
+    return X[:4000], y[:4000], X[4000:], y[4000:]
+
+
 def test_exponential(train_test):
     X_train, y_train, X_test, y_test = train_test
 
@@ -37,3 +55,157 @@ def test_exponential(train_test):
     assert r2 > 0.9
     assert scoring < 0.4
     assert maximum_error < 5
+
+
+def test_prediction_interval(synthetic_train_test):
+    X_train, y_train, X_test, y_test = synthetic_train_test
+
+    model = ExponentialModel(w0=0.05, w1=0.05, w2=0.1, n_bootstrap=30, random_state=0)
+    model.fit(X_train, y_train)
+    assert model.bootstrap_params_.shape == (30, 4)
+    y_pred, lower, upper = model.predict(X_test, return_interval=True, alpha=0.1)
+    np.testing.assert_allclose(y_pred, model.predict(X_test))
+    assert np.all(lower < y_pred) and np.all(y_pred < upper)
+    coverage = np.mean((lower <= y_test) & (y_test <= upper))
+    assert 0.85 < coverage < 0.99
+
+    # The delta method is close to evaluating every bootstrap parameter set
+    ensemble = np.stack(
+        [model._model_func(X_test, *params) for params in model.bootstrap_params_]
+    )
+    std = np.sqrt(ensemble.var(axis=0) + model.residual_std_**2)
+    np.testing.assert_allclose(upper - y_pred, 1.6448536 * std, rtol=1e-3)
+    # The ensemble spread alone, without the residual noise which dominates
+    # the margin, within the linearization error
+    model.residual_std_ = 0.0
+    _, _, upper = model.predict(X_test, return_interval=True, alpha=0.1)
+    np.testing.assert_allclose(
+        upper - y_pred, 1.6448536 * ensemble.std(axis=0), rtol=0.1
+    )
+
+    point, low, high = model.predict_endpoint(
+        distance=10, mileage=0, fuel_price=1.5, return_interval=True
+    )
+    assert low < point < high
+    unrounded = model.predict_endpoint(
+        distance=10, mileage=0, fuel_price=1.5, precision=None, return_interval=True
+    )
+    assert unrounded[0] == model.predict(np.array([[10.0, 0.0, 1.5]]))[0]
+    assert tuple(round(value, 3) for value in unrounded) == (point, low, high)
+
+
+def test_prediction_interval_needs_bootstrap(synthetic_train_test, monkeypatch):
+    X_train, y_train, X_test, _ = synthetic_train_test
+
+    model = ExponentialModel(w0=0.05, w1=0.05, w2=0.1).fit(X_train, y_train)
+    y_pred = model.predict(X_test)
+    with pytest.raises(ValueError):
+        model.predict(X_test, return_interval=True)
+
+    # When the bootstrap refits do not converge, the model is still fitted
+    model = ExponentialModel(w0=0.05, w1=0.05, w2=0.1, n_bootstrap=5)
+    real_curve_fit = base.curve_fit
+
+    def curve_fit(*args, maxfev, **kwargs):
+        if maxfev < 10000:
+            raise RuntimeError("Optimal parameters not found")
+        return real_curve_fit(*args, maxfev=maxfev, **kwargs)
+
+    monkeypatch.setattr(base, "curve_fit", curve_fit)
+    with pytest.warns(RuntimeWarning, match="bootstrap"):
+        model.fit(X_train, y_train)
+    assert not hasattr(model, "bootstrap_params_")
+    np.testing.assert_allclose(model.predict(X_test), y_pred)
+
+
+@pytest.mark.slow
+def test_prediction_interval_latency(synthetic_train_test):
+    """
+    Benchmark: intervals stay a small multiple of a point prediction on
+    100k rows, also with unrounded distances (all different).
+    """
+    X_train, y_train, _, _ = synthetic_train_test
+    model = ExponentialModel(w0=0.05, w1=0.05, w2=0.1, n_bootstrap=50, random_state=0)
+    model.fit(X_train, y_train)
+    rng = np.random.default_rng(0)
+    n_rows = 100_000
+    X = np.column_stack(
+        [
+            rng.lognormal(mean=2.5, sigma=1.0, size=n_rows) + 1,
+            np.zeros(n_rows),
+            rng.uniform(1.4, 1.8, size=n_rows),
+        ]
+    )
+
+    def best_time(func, repeat=20):
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    point = best_time(lambda: model.predict(X))
+    interval = best_time(lambda: model.predict(X, return_interval=True))
+    assert interval < 5 * point
+
+
+def test_partial_fit(synthetic_train_test):
+    X_train, y_train, X_test, y_test = synthetic_train_test
+
+    model = ExponentialModel(w0=0.05, w1=0.05, w2=0.1).fit(
+        X_train[:1000], y_train[:1000]
+    )
+    model.partial_fit(X_train[1000:3000], y_train[1000:3000], history_weight=0.5)
+    assert model.X_.shape == (3000, 3)
+    model.partial_fit(X_train[3000:], y_train[3000:], max_history=2000)
+    assert model.X_.shape == (2000 + len(X_train) - 3000, 3)
+    np.testing.assert_array_equal(model.X_[-10:], X_train[-10:])
+
+    y_pred = model.predict(X_test)
+    failures = check_accuracy(
+        mse=mean_squared_error(y_true=y_test, y_pred=y_pred),
+        r2=r2_score(y_true=y_test, y_pred=y_pred),
+        maximum_error=np.max(np.abs(y_pred - y_test)),
+    )
+    assert failures == []
+    assert len(check_accuracy(mse=1.0, r2=0.5, maximum_error=10)) == 3
+
+    # The bootstrap can be turned on and off between updates
+    model.set_params(n_bootstrap=5, random_state=0)
+    model.partial_fit(X_test[:500], y_test[:500])
+    assert model.bootstrap_params_.shape == (5, 4)
+    model.set_params(n_bootstrap=0)
+    model.partial_fit(X_test[500:], y_test[500:])
+    assert not hasattr(model, "bootstrap_params_")
+
+    with pytest.raises(ValueError):
+        model.partial_fit(X_test, y_test, history_weight=0)
+
+
+def test_predict_columns(synthetic_train_test):
+    X_train, y_train, X_test, _ = synthetic_train_test
+
+    model = ExponentialModel(w0=0.05, w1=0.05, w2=0.1).fit(X_train, y_train)
+    expected = model.predict(X_test)
+    X_test = np.asfortranarray(X_test)
+    y_pred = model.predict_columns(X_test[:, 0], X_test[:, 2], chunk_size=100)
+    np.testing.assert_allclose(y_pred, expected, rtol=1e-12)
+
+    out = np.empty(len(X_test), dtype=np.float32)
+    y_pred = model.predict_columns(X_test[:, 0], X_test[:, 2], out=out)
+    assert y_pred is out
+    np.testing.assert_allclose(y_pred, expected, rtol=1e-5)
+
+    with pytest.raises(ValueError):
+        model.predict_columns(X_test[:, 0], X_test[:10, 2])
+
+
+def test_check_rejected():
+    valid = np.ones(100, dtype=bool)
+    valid[:5] = False
+    check_rejected("train", valid, {"cost_consistency": 5}, max_fraction=0.05)
+    valid[5] = False
+    with pytest.raises(ValueError, match="cost_consistency"):
+        check_rejected("train", valid, {"cost_consistency": 6}, max_fraction=0.05)
+    check_rejected("test", np.ones(0, dtype=bool), {}, max_fraction=0.05)
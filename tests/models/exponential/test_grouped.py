@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import r2_score
+
+from src.data.synthetic import generate_trips
+from src.models.exponential.base import ExponentialModel
+from src.models.exponential.grouped import GroupedExponentialModel
+
+SEGMENT_PARAMS = {
+    "diesel": (0.05, 0.05, 0.1, 0.0),
+    "petrol": (0.07, 0.06, 0.15, 0.0),
+    "van": (0.08, 0.06, 0.1, 0.0),
+}
+
+
+@pytest.fixture
+def fleet():
+    frames = []
+    for seed, (vehicle, params) in enumerate(SEGMENT_PARAMS.items()):
+        df = pd.concat(generate_trips(n_rows=1500, params=params, random_state=seed))
+        frames.append(df[df.distancia > 1].assign(vehicle=vehicle))
+    df = pd.concat(frames).sample(frac=1, random_state=0)
+    X = df[["distancia", "kilometraje", "precio_carburante"]].to_numpy()
+    return X, df["coste"].to_numpy(), df["vehicle"].to_numpy()
+
+
+def test_grouped_model_fits_each_segment(fleet):
+    X, y, vehicles = fleet
+
+    model = GroupedExponentialModel(w0=0.05, w1=0.5, w2=0.1, n_jobs=2)
+    model.fit(X, y, segments=vehicles)
+    assert list(model.segments_) == sorted(SEGMENT_PARAMS)
+    assert model.params_.shape == (len(SEGMENT_PARAMS) + 1, 4)
+
+    y_pred = model.predict(X, segments=vehicles)
+    for vehicle, params in SEGMENT_PARAMS.items():
+        mask = vehicles == vehicle
+        expected = ExponentialModel._model_func(X[mask], *params)
+        assert np.median(np.abs(y_pred[mask] - expected) / expected) < 0.01
+
+    global_model = ExponentialModel(w0=0.05, w1=0.5, w2=0.1).fit(X, y)
+    assert r2_score(y, y_pred) > global_model.score(X, y)
+
+
+def test_grouped_model_falls_back_to_global_params(fleet):
+    X, y, vehicles = fleet
+
+    model = GroupedExponentialModel(w0=0.05, w1=0.5, w2=0.1, min_samples=10**6)
+    model.fit(X, y, segments=vehicles)
+    np.testing.assert_array_equal(model.params_, model.params_[[-1] * 4])
+
+    model = GroupedExponentialModel(w0=0.05, w1=0.5, w2=0.1).fit(X, y, vehicles)
+    unknown = np.full(len(X), "truck")
+    np.testing.assert_allclose(
+        model.predict(X, segments=unknown),
+        ExponentialModel._model_func(X, *model.params_[-1]),
+    )
+
+
+def test_grouped_model_mileage_bins(fleet):
+    X, y, _ = fleet
+
+    model = GroupedExponentialModel(
+        w0=0.05, w1=0.5, w2=0.1, mileage_bins=[10_000, 20_000]
+    )
+    model.fit(X, y)
+    assert list(model.segments_) == [0, 1, 2]
+    assert model.predict(X).shape == y.shape
+    with pytest.raises(ValueError):
+        GroupedExponentialModel().fit(X, y)
@@ -0,0 +1,70 @@
+import numpy as np
+
+import mlflow
+from src.utils.artifacts import (
+    DATASET_HASH_TAG,
+    DATASET_URI_TAG,
+    hash_directory,
+    log_dataset,
+    save_and_log_model,
+)
+
+
+def test_hash_directory(tmp_path):
+    (tmp_path / "a.csv").write_text("1,2,3")
+    digest, n_bytes = hash_directory(tmp_path)
+    assert n_bytes == 5
+    assert hash_directory(tmp_path)[0] == digest
+    (tmp_path / "a.csv").rename(tmp_path / "b.csv")
+    assert hash_directory(tmp_path)[0] != digest
+
+
+def test_log_dataset_deduplicates(mlflow_tracking):
+    data = mlflow_tracking / "data"
+    data.mkdir()
+    (data / "train.csv").write_text("distancia,coste\n1.5,0.2\n")
+    with mlflow.start_run() as first:
+        assert log_dataset(data) > 0
+    artifacts = mlflow.artifacts.list_artifacts(run_id=first.info.run_id)
+    assert [artifact.path for artifact in artifacts] == ["data"]
+    with mlflow.start_run() as second:
+        assert log_dataset(data) == 0
+    tags = [mlflow.get_run(r.info.run_id).data.tags for r in (first, second)]
+    assert tags[0][DATASET_HASH_TAG] == tags[1][DATASET_HASH_TAG]
+    assert tags[0][DATASET_URI_TAG] == tags[1][DATASET_URI_TAG]
+    assert tags[0][DATASET_URI_TAG].endswith(f"{first.info.run_id}/artifacts/data")
+    assert mlflow.artifacts.list_artifacts(run_id=second.info.run_id) == []
+
+    (data / "test.csv").write_text("distancia,coste\n2.5,0.3\n")
+    with mlflow.start_run():
+        assert log_dataset(data) > 0
+
+
+def test_log_several_datasets(mlflow_tracking):
+    data = mlflow_tracking / "data"
+    data.mkdir()
+    (data / "train.csv").write_text("distancia,coste\n1.5,0.2\n")
+    new_data = mlflow_tracking / "new.csv"
+    new_data.write_text("distancia,coste\n2.5,0.3\n")
+    with mlflow.start_run() as run:
+        log_dataset(data)
+        assert log_dataset(new_data, artifact_path="new_data", name="new_data") > 0
+    tags = mlflow.get_run(run.info.run_id).data.tags
+    assert tags[DATASET_URI_TAG].endswith("artifacts/data")
+    assert tags["new_data_uri"].endswith("artifacts/new_data/new.csv")
+    assert tags["new_data_hash"] != tags[DATASET_HASH_TAG]
+
+
+def test_save_and_log_model(mlflow_tracking, toy_X, fit_toy_model):
+    X = toy_X
+    model = fit_toy_model()
+    (mlflow_tracking / "model").mkdir()
+    (mlflow_tracking / "model" / "stale.txt").write_text("old")
+    with mlflow.start_run() as run:
+        n_bytes = save_and_log_model(model, path="model")
+    assert n_bytes > 0
+    assert not (mlflow_tracking / "model" / "stale.txt").exists()
+    loaded = mlflow.sklearn.load_model("model")
+    np.testing.assert_allclose(loaded.predict(X), model.predict(X))
+    remote = mlflow.sklearn.load_model(f"runs:/{run.info.run_id}/model")
+    np.testing.assert_allclose(remote.predict(X), model.predict(X))
@@ -0,0 +1,28 @@
+import mlflow
+from src.utils.profiling import StageProfiler
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = StageProfiler()
+    with profiler.stage("fit"):
+        pass
+    profiler.record("fit", 1.0)
+    assert profiler.timings == {}
+
+
+def test_profiler_logs_to_mlflow(mlflow_tracking):
+    profiler = StageProfiler(cprofile=True)
+    for _ in range(2):
+        with profiler.stage("fit"):
+            sum(range(1000))
+    profiler.record("remote_fit", 0.5)
+    profiler.record("remote_fit", 0.25)
+    assert set(profiler.timings) == {"fit", "remote_fit"}
+    assert profiler.timings["remote_fit"] == 0.75
+    with mlflow.start_run() as run:
+        profiler.log_to_mlflow()
+    run = mlflow.get_run(run.info.run_id)
+    assert run.data.metrics["time_fit"] == profiler.timings["fit"]
+    assert run.data.metrics["time_remote_fit"] == 0.75
+    artifacts = mlflow.artifacts.list_artifacts(run_id=run.info.run_id)
+    assert [artifact.path for artifact in artifacts] == ["profile"]